@@ -6,12 +6,59 @@ Sino Claude Code Skills Marketplace CLI
 """
 
 import os
+import re
 import sys
-import json
 import shutil
 import argparse
+import bisect
+import subprocess
 from pathlib import Path
 from datetime import datetime
+from collections import defaultdict
+
+# 优先使用C实现的JSON库加速配置读写: orjson > ujson > json
+try:
+    import orjson
+
+    def _json_loads(data: bytes):
+        return orjson.loads(data)
+
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    try:
+        import ujson
+
+        def _json_loads(data: bytes):
+            return ujson.loads(data)
+
+        def _json_dumps(obj) -> bytes:
+            return ujson.dumps(obj, indent=2, ensure_ascii=False,
+                               escape_forward_slashes=False).encode('utf-8')
+    except ImportError:
+        import json
+
+        def _json_loads(data: bytes):
+            return json.loads(data)
+
+        def _json_dumps(obj) -> bytes:
+            return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+# 技能包可选字段的默认值，加载配置时统一补齐，之后可直接按键取值
+_SKILL_DEFAULTS = {
+    "rating": 0,
+    "reviews": 0,
+    "downloads": 0,
+    "tags": [],
+    "installed": False,
+    "license": "N/A",
+    "features": [],
+}
+
+# 搜索分词: 按非字母数字字符切分（中文字符视为字母）
+_TOKEN_RE = re.compile(r"[^\W_]+")
+# 关键词中出现空白以外的符号（如 c++、node.js）时按整体子串匹配
+_SYMBOL_RE = re.compile(r"[^\w\s]|_")
 
 # 设置标准输出编码为UTF-8
 if sys.platform == 'win32':
@@ -20,6 +67,43 @@ if sys.platform == 'win32':
     sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
 
 
+def _fast_copytree(src, dst):
+    """复制技能包目录
+
+    Windows上shutil.copytree处理大量小文件极慢，改用robocopy多线程复制；
+    Linux/macOS上优先用cp进行写时复制(reflink/clonefile)，文件系统支持时几乎不占额外时间和空间；
+    其他情况使用shutil.copytree。
+    """
+    if sys.platform == 'win32':
+        result = subprocess.run(
+            ["robocopy", str(src), str(dst), "/MT:64", "/E", "/NFL", "/NDL", "/NJH", "/NJS"],
+            check=False
+        )
+        # robocopy 返回码 0-7 表示成功，8 及以上表示失败
+        if result.returncode > 7:
+            raise OSError(f"robocopy 复制失败 (返回码 {result.returncode})")
+        return
+
+    if sys.platform.startswith('linux'):
+        # --reflink=auto 在不支持写时复制的文件系统上自动退化为普通复制
+        command = ["cp", "-a", "--reflink=auto", f"{src}/.", str(dst)]
+    elif sys.platform == 'darwin':
+        # APFS 上 -c 使用 clonefile
+        command = ["cp", "-c", "-R", str(src), str(dst)]
+    else:
+        command = None
+
+    if command:
+        try:
+            subprocess.run(command, check=True, capture_output=True)
+            return
+        except (OSError, subprocess.CalledProcessError):
+            # cp 不可用或复制失败时清理残留，改用 shutil.copytree
+            shutil.rmtree(dst, ignore_errors=True)
+
+    shutil.copytree(src, dst)
+
+
 class MarketplaceCLI:
     """市场CLI工具类"""
 
@@ -34,16 +118,53 @@ class MarketplaceCLI:
     def load_config(self):
         """加载市场配置"""
         if self.config_file.exists():
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                self.config = json.load(f)
+            self.config = _json_loads(self.config_file.read_bytes())
+            # 建立 id -> 技能包 索引，避免每次查找都线性扫描；
+            # 以下划线开头的键为运行时缓存，保存配置时会被过滤
+            self._skills_by_id = {}
+            # 倒排索引: 词 -> 技能包ID集合
+            self._index = defaultdict(set)
+            # 搜索结果缓存: 小写关键词 -> 匹配的技能包ID集合
+            self._search_cache = {}
+            for skill in self.config.get("skills", []):
+                # 记录补上默认值的字段，保存时若仍为默认值则不写回配置文件
+                skill["_defaulted"] = [key for key in _SKILL_DEFAULTS if key not in skill]
+                for key in skill["_defaulted"]:
+                    default = _SKILL_DEFAULTS[key]
+                    skill[key] = list(default) if isinstance(default, list) else default
+                skill["_resolved_path"] = self.marketplace_dir / skill.get("path", f"skills/{skill['id']}")
+                # 预先拼接小写搜索文本，字段间用\x1f分隔以免跨字段误匹配
+                skill["_search_blob"] = "\x1f".join(
+                    [skill["name"], skill["description"], *skill["tags"]]
+                ).lower()
+                for token in _TOKEN_RE.findall(skill["_search_blob"]):
+                    self._index[token].add(skill["id"])
+                self._skills_by_id[skill["id"]] = skill
+            # 词表所有后缀的有序列表，用于二分查找包含某个子串的词（中文词不以空格分隔）
+            suffixes = sorted(
+                (token[i:], token) for token in self._index for i in range(len(token))
+            )
+            self._suffixes = [suffix for suffix, _ in suffixes]
+            self._suffix_tokens = [token for _, token in suffixes]
         else:
             print(f"❌ 错误: 找不到市场配置文件 {self.config_file}")
             sys.exit(1)
 
     def save_config(self):
         """保存市场配置"""
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(self.config, f, indent=2, ensure_ascii=False)
+        config = dict(self.config)
+        if "skills" in config:
+            config["skills"] = [
+                {k: v for k, v in skill.items()
+                 if not k.startswith("_")
+                 and not (k in skill.get("_defaulted", ()) and v == _SKILL_DEFAULTS[k])}
+                for skill in config["skills"]
+            ]
+
+        # 先写临时文件再原子替换，避免写入中断导致配置文件损坏
+        tmp_file = self.config_file.with_suffix(".json.tmp")
+        tmp_file.write_bytes(_json_dumps(config))
+        os.replace(tmp_file, self.config_file)
 
     def list_skills(self):
         """列出所有可用的技能包"""
@@ -71,19 +192,19 @@ class MarketplaceCLI:
             print(f"   作者: {skill['author']}")
 
             # 标签
-            tags = skill.get("tags", [])
+            tags = skill["tags"]
             if tags:
                 print(f"   标签: {', '.join(tags[:5])}")
 
             # 评分
-            rating = skill.get("rating", 0)
-            reviews = skill.get("reviews", 0)
-            downloads = skill.get("downloads", 0)
+            rating = skill["rating"]
+            reviews = skill["reviews"]
+            downloads = skill["downloads"]
             print(f"   评分: {'⭐' * int(rating)} ({rating}/5.0)")
             print(f"   下载: {downloads}+ | 评论: {reviews}")
 
             # 安装状态
-            if skill.get("installed", False):
+            if skill["installed"]:
                 print(f"   状态: ✅ 已安装")
             else:
                 print(f"   状态: ⭕ 未安装")
@@ -97,13 +218,9 @@ class MarketplaceCLI:
         skills = self.config.get("skills", [])
         keyword_lower = keyword.lower()
 
-        matched_skills = []
-        for skill in skills:
-            # 在名称、描述、标签中搜索
-            if (keyword_lower in skill["name"].lower() or
-                keyword_lower in skill["description"].lower() or
-                any(keyword_lower in tag.lower() for tag in skill.get("tags", []))):
-                matched_skills.append(skill)
+        # 在名称、描述、标签中搜索，多个关键词之间为 AND 关系
+        matched_ids = self._match_skill_ids(keyword_lower)
+        matched_skills = [skill for skill in skills if skill["id"] in matched_ids]
 
         if not matched_skills:
             print(f"❌ 未找到匹配 '{keyword}' 的技能包\n")
@@ -115,11 +232,62 @@ class MarketplaceCLI:
             print(f"📦 {skill['name']} (v{skill['version']})")
             print(f"   {skill['description']}\n")
 
+    def _match_skill_ids(self, keyword_lower):
+        """返回匹配关键词的技能包ID集合
+
+        关键词分词后逐词查倒排索引（词内按子串匹配），再对各词的结果取交集。
+        结果按关键词缓存；新关键词以某个已缓存关键词开头时，其结果必为后者的子集，
+        只需在该子集内过滤。
+        """
+        tokens = set(_TOKEN_RE.findall(keyword_lower))
+        if not tokens or _SYMBOL_RE.search(keyword_lower):
+            # 关键词含符号或无法分词时，退回整体子串匹配（不参与缓存）
+            return {skill_id for skill_id, skill in self._skills_by_id.items()
+                    if keyword_lower in skill["_search_blob"]}
+
+        if keyword_lower in self._search_cache:
+            return self._search_cache[keyword_lower]
+
+        for prefix in sorted(self._search_cache, key=len, reverse=True):
+            if keyword_lower.startswith(prefix):
+                matched = {
+                    skill_id for skill_id in self._search_cache[prefix]
+                    if all(token in self._skills_by_id[skill_id]["_search_blob"] for token in tokens)
+                }
+                break
+        else:
+            matched = self._lookup_index(tokens)
+
+        self._search_cache[keyword_lower] = matched
+        return matched
+
+    def _lookup_token(self, token):
+        """返回包含 token（作为词或词的一部分）的技能包ID集合"""
+        # 以 token 开头的后缀在有序列表中相邻，对应的词都包含 token；
+        # 词本身是从位置 0 开始的后缀，完全相同的词也在其中
+        ids = set()
+        i = bisect.bisect_left(self._suffixes, token)
+        while i < len(self._suffixes) and self._suffixes[i].startswith(token):
+            ids |= self._index[self._suffix_tokens[i]]
+            i += 1
+        return ids
+
+    def _lookup_index(self, tokens):
+        """在倒排索引中查找同时包含所有词的技能包ID"""
+        postings = []
+        for token in tokens:
+            ids = self._lookup_token(token)
+            if not ids:
+                return set()
+            postings.append(ids)
+
+        # 从最短的结果集开始求交集
+        postings.sort(key=len)
+        return set.intersection(*postings)
+
     def show_skill_info(self, skill_id):
         """显示技能包详细信息"""
-        skills = self.config.get("skills", [])
-
-        skill = next((s for s in skills if s["id"] == skill_id), None)
+        skill = self._skills_by_id.get(skill_id)
 
         if not skill:
             print(f"❌ 错误: 找不到技能包 '{skill_id}'\n")
@@ -132,18 +300,18 @@ class MarketplaceCLI:
         print(f"**ID**: {skill['id']}")
         print(f"**版本**: {skill['version']}")
         print(f"**作者**: {skill['author']}")
-        print(f"**许可证**: {skill.get('license', 'N/A')}\n")
+        print(f"**许可证**: {skill['license']}\n")
 
         print(f"**描述**:")
         print(f"   {skill['description']}\n")
 
-        if skill.get("features"):
+        if skill["features"]:
             print(f"**功能特性**:")
             for feature in skill["features"]:
                 print(f"   - {feature}")
             print()
 
-        if skill.get("tags"):
+        if skill["tags"]:
             tags_str = ", ".join(skill["tags"])
             print(f"**标签**: {tags_str}\n")
 
@@ -159,23 +327,22 @@ class MarketplaceCLI:
 
         # 统计信息
         print(f"**统计**:")
-        print(f"   - 下载量: {skill.get('downloads', 0)}+")
-        print(f"   - 评分: {'⭐' * int(skill.get('rating', 0))} ({skill.get('rating', 0)}/5.0)")
-        print(f"   - 评论数: {skill.get('reviews', 0)}\n")
+        print(f"   - 下载量: {skill['downloads']}+")
+        print(f"   - 评分: {'⭐' * int(skill['rating'])} ({skill['rating']}/5.0)")
+        print(f"   - 评论数: {skill['reviews']}\n")
 
     def install_skill(self, skill_id):
         """安装技能包"""
         print(f"\n📦 正在安装技能包: {skill_id}\n")
 
-        skills = self.config.get("skills", [])
-        skill = next((s for s in skills if s["id"] == skill_id), None)
+        skill = self._skills_by_id.get(skill_id)
 
         if not skill:
             print(f"❌ 错误: 找不到技能包 '{skill_id}'\n")
             return False
 
         # 检查技能包路径
-        skill_path = self.marketplace_dir / skill.get("path", f"skills/{skill_id}")
+        skill_path = skill["_resolved_path"]
 
         if not skill_path.exists():
             print(f"❌ 错误: 技能包路径不存在: {skill_path}\n")
@@ -193,15 +360,12 @@ class MarketplaceCLI:
                 print(f"⚠️  警告: 目标目录已存在，将覆盖现有安装")
                 shutil.rmtree(target_path)
 
-            shutil.copytree(skill_path, target_path)
+            _fast_copytree(skill_path, target_path)
             print(f"✅ 技能包已成功安装到: {target_path}\n")
 
-            # 更新安装状态
+            # 更新安装状态和下载统计，一次性写回配置
             skill["installed"] = True
-            self.save_config()
-
-            # 更新下载统计
-            skill["downloads"] = skill.get("downloads", 0) + 1
+            skill["downloads"] += 1
             self.save_config()
 
             print(f"📝 提示: 重启Claude Code以使技能包生效\n")
@@ -226,8 +390,7 @@ class MarketplaceCLI:
             print(f"✅ 技能包已成功卸载\n")
 
             # 更新安装状态
-            skills = self.config.get("skills", [])
-            skill = next((s for s in skills if s["id"] == skill_id), None)
+            skill = self._skills_by_id.get(skill_id)
             if skill:
                 skill["installed"] = False
                 self.save_config()
@@ -243,14 +406,13 @@ class MarketplaceCLI:
         """更新技能包"""
         print(f"\n🔄 正在更新技能包: {skill_id}\n")
 
-        skills = self.config.get("skills", [])
-        skill = next((s for s in skills if s["id"] == skill_id), None)
+        skill = self._skills_by_id.get(skill_id)
 
         if not skill:
             print(f"❌ 错误: 找不到技能包 '{skill_id}'\n")
             return False
 
-        if not skill.get("installed", False):
+        if not skill["installed"]:
             print(f"❌ 错误: 技能包未安装，请先安装再更新\n")
             return False
 
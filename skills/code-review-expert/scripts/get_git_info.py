@@ -4,12 +4,42 @@ Git信息提取工具
 用于代码审查时提取git仓库的变更信息、提交者信息等
 """
 
+import os
 import subprocess
+import tempfile
 import json
 import sys
 import argparse
-from datetime import datetime
-from typing import Dict, List, Any
+import functools
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+# 可选依赖: 安装pygit2后直接读取仓库元数据,无需启动git子进程
+try:
+    import pygit2
+except ImportError:
+    pygit2 = None
+
+# 可选依赖: 安装orjson后用其序列化JSON输出(diff较大时明显更快)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 文本格式输出时最多显示的diff行数
+MAX_DIFF_LINES = 500
+
+# 完整diff的变更行数(新增+删除)超过该值时默认跳过diff,可用 --force-diff 强制获取
+MAX_FULL_DIFF_CHANGES = 50000
+
+
+def dumps_json(obj: Any) -> bytes:
+    """将对象序列化为缩进2格的UTF-8 JSON字节串"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
 
 
 def run_git_command(command: List[str]) -> str:
@@ -31,19 +61,51 @@ def run_git_command(command: List[str]) -> str:
         return ""
 
 
+@functools.lru_cache(maxsize=1)
+def _open_repository() -> Optional["pygit2.Repository"]:
+    """使用pygit2打开当前目录所在的仓库,pygit2不可用或不在仓库中时返回None"""
+    if pygit2 is None:
+        return None
+
+    try:
+        repo_path = pygit2.discover_repository(os.getcwd())
+        if not repo_path:
+            return None
+        repo = pygit2.Repository(repo_path)
+    except (pygit2.GitError, KeyError, ValueError):
+        return None
+
+    return None if repo.is_bare else repo
+
+
 def is_git_repository() -> bool:
     """检查是否在git仓库中"""
+    if _open_repository() is not None:
+        return True
+
     result = run_git_command(["git", "rev-parse", "--is-inside-work-tree"])
     return result == "true"
 
 
 def get_current_branch() -> str:
     """获取当前分支名"""
+    repo = _open_repository()
+    if repo is not None and not repo.head_is_unborn:
+        # 与 git rev-parse --abbrev-ref HEAD 保持一致: 分离HEAD时返回 "HEAD"
+        return "HEAD" if repo.head_is_detached else repo.head.shorthand
+
     return run_git_command(["git", "rev-parse", "--abbrev-ref", "HEAD"])
 
 
 def get_remote_url() -> str:
     """获取远程仓库URL"""
+    repo = _open_repository()
+    if repo is not None:
+        try:
+            return repo.remotes["origin"].url or ""
+        except KeyError:
+            return ""
+
     return run_git_command(["git", "config", "--get", "remote.origin.url"])
 
 
@@ -105,8 +167,8 @@ def get_file_status_description(status: str) -> str:
     return status
 
 
-def get_diff(commit_range: str = None, file_path: str = None) -> str:
-    """获取代码差异"""
+def _diff_command(commit_range: str = None, file_path: str = None) -> List[str]:
+    """构造git diff命令"""
     command = ["git", "diff"]
 
     if commit_range:
@@ -119,32 +181,170 @@ def get_diff(commit_range: str = None, file_path: str = None) -> str:
         command.append("--")
         command.append(file_path)
 
-    return run_git_command(command)
+    return command
 
 
-def get_last_commit_info() -> Dict[str, Any]:
-    """获取最后一次提交信息"""
-    # 获取提交哈希
-    commit_hash = run_git_command(["git", "rev-parse", "HEAD"])
+def get_diff(commit_range: str = None, file_path: str = None) -> str:
+    """获取代码差异"""
+    return run_git_command(_diff_command(commit_range, file_path))
+
+
+def get_diff_head(commit_range: str = None, max_lines: int = MAX_DIFF_LINES) -> Tuple[str, bool]:
+    """
+    获取代码差异的前max_lines行
 
-    # 获取作者信息
-    author_name = run_git_command(["git", "log", "-1", "--pretty=%an"])
-    author_email = run_git_command(["git", "log", "-1", "--pretty=%ae"])
+    边读边停,读够行数后即终止git进程,不会把完整diff读入内存。
 
-    # 获取提交者信息(可能与作者不同)
-    committer_name = run_git_command(["git", "log", "-1", "--pretty=%cn"])
-    committer_email = run_git_command(["git", "log", "-1", "--pretty=%ce"])
+    Returns:
+        Tuple[str, bool]: (diff内容, 是否被截断)
+    """
+    command = _diff_command(commit_range)
+    # stderr写入临时文件而非管道:只读stdout时,大量警告(如CRLF提示)写满stderr管道会使git阻塞
+    stderr_file = tempfile.TemporaryFile()
+    try:
+        proc = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=stderr_file,
+            text=True,
+            encoding='utf-8',
+            errors='replace'
+        )
+    except FileNotFoundError:
+        stderr_file.close()
+        print("错误: 未找到git命令,请确保git已安装", file=sys.stderr)
+        return "", False
+
+    lines = []
+    truncated = False
+    with proc, stderr_file:
+        for line in proc.stdout:
+            if len(lines) >= max_lines:
+                truncated = True
+                break
+            lines.append(line.rstrip('\n'))
+
+        if truncated:
+            proc.terminate()
+        else:
+            if proc.wait() != 0:
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode('utf-8', errors='replace')
+                print(f"错误: 执行git命令失败: {' '.join(command)}", file=sys.stderr)
+                print(f"错误信息: {stderr}", file=sys.stderr)
+                return "", False
 
-    # 获取提交日期
-    commit_date = run_git_command(["git", "log", "-1", "--pretty=%ci"])
-    commit_date_timestamp = run_git_command(["git", "log", "-1", "--pretty=%ct"])
+    return "\n".join(lines).strip(), truncated
 
-    # 获取提交消息
-    commit_message = run_git_command(["git", "log", "-1", "--pretty=%B"])
+
+def _approximate_object_count(repo: "pygit2.Repository") -> int:
+    """与git的approximate_object_count一致: 只累加pack索引中的对象数,不统计松散对象"""
+    count = 0
+    pack_dir = os.path.join(repo.path, 'objects', 'pack')
+    try:
+        names = os.listdir(pack_dir)
+    except OSError:
+        return 0
+    for name in names:
+        if not name.endswith('.idx'):
+            continue
+        try:
+            with open(os.path.join(pack_dir, name), 'rb') as f:
+                header = f.read(8 + 256 * 4)
+        except OSError:
+            continue
+        # v2索引: 4字节魔数 + 4字节版本号 + 256项fanout表; v1索引没有头部,直接是fanout表
+        fanout = header[8:] if header[:4] == b'\xfftOc' else header[:256 * 4]
+        if len(fanout) == 256 * 4:
+            count += int.from_bytes(fanout[-4:], 'big')
+    return count
+
+
+def _abbrev_length(repo: "pygit2.Repository") -> int:
+    """
+    按git的规则计算%h的起始缩写长度
+
+    core.abbrev为数字时取该值(最小4),为no时取完整哈希;
+    未设置或为auto时按仓库对象数估算,对象越多越长,最小为7。
+    """
+    try:
+        value = repo.config['core.abbrev']
+    except (KeyError, ValueError):
+        value = 'auto'
+    value = str(value).strip().lower()
+    if value == 'no':
+        return 40
+    if value.isdigit():
+        return min(max(int(value), 4), 40)
+
+    # 约有2^bits个对象时,需要bits/2位才能避免冲突,每个十六进制字符4位
+    bits = _approximate_object_count(repo).bit_length()
+    return max((bits + 1) // 2, 7)
+
+
+def _short_hash(repo: "pygit2.Repository", commit: "pygit2.Commit") -> str:
+    """返回与git log的%h一致的缩写哈希: 从core.abbrev对应长度开始,有歧义时逐位加长"""
+    full = str(commit.id)
+    length = _abbrev_length(repo)
+    while length < len(full):
+        try:
+            repo.revparse_single(full[:length])
+            break
+        except ValueError:
+            # 前缀对应多个对象(AmbiguousError)
+            length += 1
+        except KeyError:
+            break
+    return full[:length]
+
+
+def _last_commit_info_from_repo(repo: "pygit2.Repository") -> Dict[str, Any]:
+    """通过pygit2读取最后一次提交信息,字段与get_last_commit_info一致"""
+    commit = repo.head.peel(pygit2.Commit)
+    commit_tz = timezone(timedelta(minutes=commit.commit_time_offset))
+    commit_date = datetime.fromtimestamp(commit.commit_time, commit_tz)
+    message = commit.message.strip()
+
+    return {
+        'hash': str(commit.id),
+        'short_hash': _short_hash(repo, commit),
+        'author': {
+            'name': commit.author.name,
+            'email': commit.author.email
+        },
+        'committer': {
+            'name': commit.committer.name,
+            'email': commit.committer.email
+        },
+        'date': commit_date.strftime('%Y-%m-%d %H:%M:%S %z'),
+        'timestamp': commit.commit_time,
+        'message': message,
+        # 与 %s 一致: 取第一段并将换行折叠为空格
+        'message_summary': ' '.join(message.split('\n\n', 1)[0].split('\n'))
+    }
+
+
+def get_last_commit_info() -> Dict[str, Any]:
+    """获取最后一次提交信息"""
+    repo = _open_repository()
+    if repo is not None and not repo.head_is_unborn:
+        return _last_commit_info_from_repo(repo)
+
+    # 一次git log取回全部字段,字段间用单元分隔符(\x1f)分隔,提交消息放在最后
+    output = run_git_command([
+        "git", "log", "-1",
+        "--pretty=format:%H%x1f%h%x1f%an%x1f%ae%x1f%cn%x1f%ce%x1f%ci%x1f%ct%x1f%s%x1f%B"
+    ])
+
+    parts = output.split('\x1f', 9) if output else []
+    parts += [""] * (10 - len(parts))
+    (commit_hash, short_hash, author_name, author_email, committer_name,
+     committer_email, commit_date, commit_date_timestamp, message_summary,
+     commit_message) = parts
 
     return {
         'hash': commit_hash,
-        'short_hash': run_git_command(["git", "rev-parse", "--short", "HEAD"]),
+        'short_hash': short_hash,
         'author': {
             'name': author_name,
             'email': author_email
@@ -156,7 +356,7 @@ def get_last_commit_info() -> Dict[str, Any]:
         'date': commit_date,
         'timestamp': int(commit_date_timestamp) if commit_date_timestamp else None,
         'message': commit_message.strip(),
-        'message_summary': run_git_command(["git", "log", "-1", "--pretty=%s"])
+        'message_summary': message_summary
     }
 
 
@@ -194,7 +394,7 @@ def get_commit_history(limit: int = 10) -> List[Dict[str, Any]]:
 
 def get_statistics(commit_range: str = None) -> Dict[str, Any]:
     """获取代码统计信息"""
-    command = ["git", "diff", "--stat"]
+    command = ["git", "diff", "--numstat"]
 
     if commit_range:
         command.append(commit_range)
@@ -209,11 +409,6 @@ def get_statistics(commit_range: str = None) -> Dict[str, Any]:
             'deletions': 0
         }
 
-    # 解析最后一行统计信息
-    # 格式: " X files changed, Y insertions(+), Z deletions(-)"
-    lines = output.split('\n')
-    summary_line = lines[-1] if lines else ""
-
     stats = {
         'files_changed': 0,
         'insertions': 0,
@@ -221,56 +416,93 @@ def get_statistics(commit_range: str = None) -> Dict[str, Any]:
         'details': []
     }
 
-    # 解析详细统计
-    for line in lines:
-        if '|' in line and '(' in line:
-            # 格式: "path/to/file | X + Y -"
-            parts = line.split('|')
-            if len(parts) >= 2:
-                filename = parts[0].strip()
-                changes = parts[1]
-                stats['details'].append({
-                    'filename': filename,
-                    'changes': changes.strip()
-                })
-
-    # 解析汇总行
-    import re
-    match = re.search(r'(\d+) file', summary_line)
-    if match:
-        stats['files_changed'] = int(match.group(1))
-
-    match = re.search(r'(\d+) insertion', summary_line)
-    if match:
-        stats['insertions'] = int(match.group(1))
-
-    match = re.search(r'(\d+) deletion', summary_line)
-    if match:
-        stats['deletions'] = int(match.group(1))
+    # 逐行解析,格式: "<新增>\t<删除>\t<文件路径>",二进制文件的行数为 "-"
+    for line in output.split('\n'):
+        if not line:
+            continue
+
+        parts = line.split('\t', 2)
+        if len(parts) < 3:
+            continue
+
+        added, deleted, filename = parts
+        if added == '-' or deleted == '-':
+            changes = 'binary'
+        else:
+            stats['insertions'] += int(added)
+            stats['deletions'] += int(deleted)
+            changes = f'+{added} -{deleted}'
+
+        stats['details'].append({
+            'filename': filename,
+            'changes': changes
+        })
+
+    stats['files_changed'] = len(stats['details'])
 
     return stats
 
 
-def get_git_info(commit_range: str = None, include_diff: bool = True) -> Dict[str, Any]:
-    """获取完整的git信息"""
+def get_git_info(commit_range: str = None, include_diff: bool = True,
+                 max_diff_lines: int = None, force_diff: bool = False) -> Dict[str, Any]:
+    """
+    获取完整的git信息
+
+    指定max_diff_lines时只读取diff的前max_diff_lines行,
+    并通过 diff_truncated 标记是否有内容被省略。
+    获取完整diff时,若变更行数超过MAX_FULL_DIFF_CHANGES且未指定force_diff,
+    则不获取diff并设置 diff_skipped。
+    """
     if not is_git_repository():
         return {
             'error': '当前目录不是git仓库',
             'is_git_repo': False
         }
 
-    info = {
-        'is_git_repo': True,
-        'branch': get_current_branch(),
-        'remote_url': get_remote_url(),
-        'last_commit': get_last_commit_info(),
-        'changed_files': get_changed_files(commit_range),
-        'statistics': get_statistics(commit_range),
-        'collected_at': datetime.now().isoformat()
-    }
-
-    if include_diff:
-        info['diff'] = get_diff(commit_range)
+    # pygit2的Repository对象不宜跨线程共享,使用pygit2时元数据在当前线程读取(无需子进程)
+    read_metadata_in_process = _open_repository() is not None
+
+    # 各项查询相互独立且主要耗时在git子进程上,使用线程池并发执行
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        if not read_metadata_in_process:
+            branch = executor.submit(get_current_branch)
+            remote_url = executor.submit(get_remote_url)
+            last_commit = executor.submit(get_last_commit_info)
+        changed_files = executor.submit(get_changed_files, commit_range)
+        statistics = executor.submit(get_statistics, commit_range)
+        if include_diff and max_diff_lines is not None:
+            diff = executor.submit(get_diff_head, commit_range, max_diff_lines)
+
+        if read_metadata_in_process:
+            info = {
+                'is_git_repo': True,
+                'branch': get_current_branch(),
+                'remote_url': get_remote_url(),
+                'last_commit': get_last_commit_info(),
+            }
+        else:
+            info = {
+                'is_git_repo': True,
+                'branch': branch.result(),
+                'remote_url': remote_url.result(),
+                'last_commit': last_commit.result(),
+            }
+
+        info['changed_files'] = changed_files.result()
+        info['statistics'] = statistics.result()
+        info['collected_at'] = datetime.now().isoformat()
+
+        if include_diff:
+            if max_diff_lines is not None:
+                info['diff'], info['diff_truncated'] = diff.result()
+            else:
+                # 完整diff可能非常大,先根据统计信息判断是否获取
+                stats = info['statistics']
+                total_changes = stats['insertions'] + stats['deletions']
+                if total_changes > MAX_FULL_DIFF_CHANGES and not force_diff:
+                    info['diff_skipped'] = True
+                else:
+                    info['diff'] = get_diff(commit_range)
 
     return info
 
@@ -294,6 +526,9 @@ def main():
   # 仅获取文件变更,不包括diff
   python get_git_info.py --no-diff
 
+  # 变更行数很大时仍强制输出完整diff
+  python get_git_info.py --format json --force-diff
+
   # 输出格式化为JSON
   python get_git_info.py --format json
         '''
@@ -315,6 +550,12 @@ def main():
         help='不包含代码差异(diff)'
     )
 
+    parser.add_argument(
+        '--force-diff',
+        action='store_true',
+        help=f'变更行数超过{MAX_FULL_DIFF_CHANGES}时仍获取完整diff(默认跳过)'
+    )
+
     parser.add_argument(
         '--format',
         choices=['text', 'json'],
@@ -336,23 +577,35 @@ def main():
         # 为安全起见,仅获取分支信息
         pass
 
-    # 获取git信息
-    info = get_git_info(commit_range, not args.no_diff)
+    # 获取git信息(文本格式只显示diff的前MAX_DIFF_LINES行,无需读取完整diff)
+    max_diff_lines = MAX_DIFF_LINES if args.format == 'text' else None
+    info = get_git_info(commit_range, not args.no_diff, max_diff_lines, args.force_diff)
 
-    # 格式化输出
+    # 格式化输出(统一为UTF-8字节,JSON写文件时无需先解码再编码)
     if args.format == 'json':
-        output = json.dumps(info, indent=2, ensure_ascii=False)
+        output = dumps_json(info)
     else:
         # 文本格式输出
-        output = format_git_info_text(info)
+        output = format_git_info_text(info).encode('utf-8')
 
     # 输出到文件或控制台
     if args.output:
-        with open(args.output, 'w', encoding='utf-8') as f:
+        with open(args.output, 'wb') as f:
             f.write(output)
         print(f"Git信息已保存到: {args.output}")
     else:
-        print(output)
+        print(output.decode('utf-8'))
+
+
+def _iter_lines(text: str) -> Iterator[str]:
+    """逐行产出文本内容,效果同 text.split('\\n') 但不会一次性生成全部行"""
+    start = 0
+    end = text.find('\n')
+    while end >= 0:
+        yield text[start:end]
+        start = end + 1
+        end = text.find('\n', start)
+    yield text[start:]
 
 
 def format_git_info_text(info: Dict[str, Any]) -> str:
@@ -403,17 +656,25 @@ def format_git_info_text(info: Dict[str, Any]) -> str:
         output.append("")
 
     # 代码差异(如果有)
-    if info.get('diff'):
+    if info.get('diff_skipped'):
+        output.append("【代码差异】")
+        output.append(f"  变更行数超过 {MAX_FULL_DIFF_CHANGES},已跳过diff,使用 --force-diff 强制获取")
+        output.append("")
+    elif info.get('diff'):
         output.append("【代码差异】")
         output.append("-" * 80)
-        diff_lines = info['diff'].split('\n')
-        # 限制显示行数,避免输出过长
-        max_lines = 500
+        diff = info['diff']
+        # 限制显示行数,避免输出过长;按需切分,只生成要显示的行
+        max_lines = MAX_DIFF_LINES
+        diff_lines = list(itertools.islice(_iter_lines(diff), max_lines + 1))
         if len(diff_lines) > max_lines:
             output.extend(diff_lines[:max_lines])
-            output.append(f"\n... (省略 {len(diff_lines) - max_lines} 行,使用 --format json 查看完整内容)")
+            omitted = diff.count('\n') + 1 - max_lines
+            output.append(f"\n... (省略 {omitted} 行,使用 --format json 查看完整内容)")
         else:
             output.extend(diff_lines)
+            if info.get('diff_truncated'):
+                output.append(f"\n... (仅显示前 {max_lines} 行,使用 --format json 查看完整内容)")
         output.append("-" * 80)
 
     return "\n".join(output)
@@ -6,15 +6,18 @@
 
 import os
 import sys
+import functools
 from datetime import datetime
 from pathlib import Path
 
 
+@functools.lru_cache(maxsize=1)
 def get_docs_directory() -> Path:
     """
     获取项目的文档目录
 
     优先级: docs/ > doc/ > 创建docs/
+    结果在进程内缓存,重复调用不再访问文件系统
 
     Returns:
         Path: 文档目录路径
@@ -74,12 +77,13 @@ def save_report(content: str, custom_name: str = None) -> str:
 
     # 保存文件
     try:
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        # 一次性编码后按字节写入,文件大小直接取编码后的长度
+        data = content.encode('utf-8')
+        report_path.write_bytes(data)
 
         print(f"\n✅ 代码审查报告已成功保存!")
         print(f"📁 位置: {report_path}")
-        print(f"📊 文件大小: {report_path.stat().st_size} 字节")
+        print(f"📊 文件大小: {len(data)} 字节")
 
         return str(report_path)
 
@@ -93,12 +97,30 @@ def list_existing_reports() -> list:
     列出现有的代码审查报告
 
     Returns:
-        list: 报告文件列表
+        list: 报告文件路径列表,按修改时间倒序排列
+    """
+    return [report for report, _ in list_existing_reports_with_stat()]
+
+
+def list_existing_reports_with_stat() -> list:
+    """
+    列出现有的代码审查报告及其文件状态
+
+    Returns:
+        list: (报告路径, os.stat_result) 列表,按修改时间倒序排列
     """
     docs_dir = get_docs_directory()
-    reports = list(docs_dir.glob("代码审查报告_*.md"))
-    reports.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-    return reports
+    # 使用scandir遍历目录,DirEntry自带stat缓存;每个文件只stat一次,排序和展示共用同一结果
+    with os.scandir(docs_dir) as it:
+        entries = [
+            (docs_dir / entry.name, entry.stat())
+            for entry in it
+            if entry.name.startswith("代码审查报告_")
+            and entry.name.endswith(".md")
+            and entry.is_file()
+        ]
+    entries.sort(key=lambda e: e[1].st_mtime, reverse=True)
+    return entries
 
 
 def main():
@@ -153,12 +175,12 @@ def main():
 
     # 列出报告
     if args.list:
-        reports = list_existing_reports()
+        reports = list_existing_reports_with_stat()
         if reports:
             print(f"\n📋 现有的代码审查报告 (共 {len(reports)} 个):\n")
-            for i, report in enumerate(reports, 1):
-                mtime = datetime.fromtimestamp(report.stat().st_mtime)
-                size = report.stat().st_size
+            for i, (report, st) in enumerate(reports, 1):
+                mtime = datetime.fromtimestamp(st.st_mtime)
+                size = st.st_size
                 print(f"{i}. {report.name}")
                 print(f"   📅 {mtime.strftime('%Y-%m-%d %H:%M:%S')}")
                 print(f"   📊 {size} 字节")
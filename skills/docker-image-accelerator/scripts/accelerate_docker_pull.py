@@ -5,10 +5,46 @@ Docker 镜像加速拉取脚本
 使用 DaoCloud 国内镜像源加速 Docker 镜像下载
 """
 
+import os
+import json
 import subprocess
 import sys
 import re
-from typing import Optional, Tuple
+import argparse
+import asyncio
+import atexit
+import functools
+import hashlib
+import logging
+import logging.handlers
+import queue
+import shlex
+import shutil
+import sqlite3
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import docker
+    import docker.errors
+    import docker.utils
+except ImportError:
+    docker = None
 
 
 # 镜像源映射配置
@@ -31,7 +67,288 @@ REGISTRY_MIRRORS = {
     "quay.m.daocloud.io": "m.daocloud.io/quay.io",
 }
 
+# 默认加速镜像源，未在 REGISTRY_MIRRORS 中配置的 registry 以前缀方式使用
+DEFAULT_MIRROR = "m.daocloud.io"
+
+# 镜像源探测超时（秒）
+MIRROR_PROBE_TIMEOUT = 2
+
+# select_fastest_mirror 结果缓存（进程内有效）
+_fastest_mirror_cache = {}
+_fastest_mirror_lock = threading.Lock()
+
+# 批量校验加速镜像 manifest 的超时（秒）
+MANIFEST_CHECK_TIMEOUT = 5
+
+# 查询 manifest 时接受的类型（多架构索引与单架构清单）
+MANIFEST_ACCEPT = ", ".join([
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.oci.image.manifest.v1+json",
+    "application/vnd.docker.distribution.manifest.v2+json",
+])
+
+# docker 可执行文件的绝对路径，导入时解析一次，避免每次执行都搜索 PATH
+_DOCKER = shutil.which("docker") or "docker"
+
+# Linux 上 Python 创建的文件描述符默认不可继承，无需在子进程中逐个关闭
+_CLOSE_FDS = not sys.platform.startswith("linux")
+
+# run_command 保留的输出尾部行数（用于错误信息）
+OUTPUT_TAIL_LINES = 200
+
+# Docker daemon 配置文件路径，以及建议的最小并发下载层数（dockerd 默认为 3）
+DAEMON_CONFIG_PATH = "/etc/docker/daemon.json"
+RECOMMENDED_CONCURRENT_DOWNLOADS = 10
+
+# --install-daemon-config 写入的 Docker Hub 加速源
+DAEMON_REGISTRY_MIRROR = "https://docker.m.daocloud.io"
+
+def _env_int(name: str, default: int) -> int:
+    """
+    读取正整数环境变量，未设置或格式错误时返回默认值
+
+    Args:
+        name: 环境变量名
+        default: 默认值
+
+    Returns:
+        int: 环境变量的值或默认值
+    """
+    try:
+        value = int(os.environ.get(name, default))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+# 默认并发拉取数，可通过环境变量 ACCEL_WORKERS 或 --jobs 调整
+# dockerd 默认 max-concurrent-downloads=3，3-9 个并发较为合适
+DEFAULT_WORKERS = _env_int("ACCEL_WORKERS", 8)
+
+# 镜像名称标准化结果的磁盘缓存目录（按用户隔离），可通过环境变量 ACCEL_CACHE 或 --cache-dir 调整
+# 需要安装 diskcache，未安装时仅使用进程内缓存
+CACHE_DIR = os.environ.get("ACCEL_CACHE") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "accel-cache"
+)
+_disk_cache = None
+_disk_cache_version = None
+_disk_cache_disabled = False
+_disk_cache_lock = threading.Lock()
+_CACHE_MISS = object()
+
+# Docker SDK 客户端（首次使用时创建，多个线程共享同一连接池）
+# 未安装 docker SDK 或无法连接 daemon 时使用 docker 命令行
+_docker_client = None
+_docker_client_disabled = False
+_docker_client_lock = threading.Lock()
+
+# 日志：输出格式为 "[级别] 内容"，额外定义 SUCCESS 级别
+SUCCESS = 25
+logging.addLevelName(SUCCESS, "SUCCESS")
+logger = logging.getLogger("accel")
+
+# 不带级别前缀的日志（分隔线、命令输出）
+_RAW = {"raw": True}
+
+# 输出锁与线程本地缓冲：并发拉取时每个镜像的日志记录先缓存，完成后整体输出，避免交错
+_output_lock = threading.Lock()
+_thread_local = threading.local()
+
+
+class _LogFormatter(logging.Formatter):
+    """带级别前缀的日志格式，raw 记录原样输出"""
+
+    def __init__(self):
+        super().__init__("[%(levelname)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "raw", False):
+            return record.getMessage()
+        return super().format(record)
+
+
+class _ThreadBufferFilter(logging.Filter):
+    """当前线程设置了缓冲区时，将日志记录暂存到缓冲区而不直接输出"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        buffer = getattr(_thread_local, "buffer", None)
+        if buffer is None:
+            return True
+        buffer.append(record)
+        return False
+
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """
+    配置日志：工作线程只把记录放入队列，由单独的监听线程写到标准输出
+
+    Returns:
+        logging.handlers.QueueListener: 已启动的监听器，退出前需调用 stop() 刷新剩余日志
+    """
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(_LogFormatter())
+    queue_handler.addFilter(_ThreadBufferFilter())
+
+    logger.addHandler(queue_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler(sys.stdout))
+    listener.start()
+    return listener
+
+
+def log(message: str = "") -> None:
+    """
+    输出一行不带级别前缀的日志
+
+    Args:
+        message: 日志内容
+    """
+    logger.info(message, extra=_RAW)
+
+
+def set_cache_dir(path: Optional[str]) -> None:
+    """
+    设置磁盘缓存目录（需在首次解析镜像名称前调用）
+
+    Args:
+        path: 缓存目录；为 None 时关闭磁盘缓存
+    """
+    global CACHE_DIR, _disk_cache, _disk_cache_disabled
+    with _disk_cache_lock:
+        if _disk_cache is not None:
+            _disk_cache.close()
+        CACHE_DIR = path
+        _disk_cache = None
+        _disk_cache_disabled = path is None
+
+
+def _cache_dir_is_safe(path: str) -> bool:
+    """
+    检查缓存目录是否只能由当前用户写入
+
+    diskcache 读取时会反序列化 pickle 数据，其他用户可写的目录可能被注入恶意缓存。
+
+    Args:
+        path: 缓存目录
+
+    Returns:
+        bool: 目录属于当前用户且组和其他用户不可写时返回 True
+    """
+    if not hasattr(os, "getuid"):
+        # Windows 上用户目录默认不与其他用户共享
+        return True
+    st = os.stat(path)
+    return st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+
+def _get_disk_cache():
+    """
+    获取磁盘缓存实例，首次使用时创建
+
+    Returns:
+        diskcache.Cache: 缓存实例；未安装 diskcache 或无法打开目录时返回 None
+    """
+    global _disk_cache, _disk_cache_disabled
+    if diskcache is None or _disk_cache_disabled:
+        return None
+
+    global _disk_cache_version
+    with _disk_cache_lock:
+        if _disk_cache is None and not _disk_cache_disabled:
+            try:
+                os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+                if not _cache_dir_is_safe(CACHE_DIR):
+                    logger.warning("Cache directory %s is not owned by the current user or is "
+                                   "writable by others, disk cache disabled", CACHE_DIR)
+                    _disk_cache_disabled = True
+                    return None
+                # 缓存键包含本脚本内容的摘要，修改映射表或解析规则后旧结果自动失效
+                with open(__file__, "rb") as f:
+                    _disk_cache_version = hashlib.sha1(f.read()).hexdigest()[:12]
+                _disk_cache = diskcache.Cache(CACHE_DIR)
+            except (OSError, sqlite3.Error):
+                # 缓存目录不可写时退回进程内缓存
+                _disk_cache_disabled = True
+        return _disk_cache
+
+
+def disk_cached(func):
+    """
+    为单参数函数添加缓存：进程内 lru_cache，之下再查询磁盘缓存
+
+    磁盘缓存以 "代码版本:函数名:参数" 为键，CI 中同一 runner 的多次运行可复用解析结果。
+    只适用于纯函数，结果不应依赖网络探测等运行时状态。
 
+    Args:
+        func: 被缓存的函数
+
+    Returns:
+        被包装后的函数
+    """
+    name = func.__name__
+
+    @functools.lru_cache(maxsize=8192)
+    @functools.wraps(func)
+    def wrapper(arg):
+        cache = _get_disk_cache()
+        if cache is None:
+            return func(arg)
+
+        key = f"{_disk_cache_version}:{name}:{arg}"
+        try:
+            value = cache.get(key, _CACHE_MISS)
+        except sqlite3.Error:
+            value = _CACHE_MISS
+        if value is _CACHE_MISS:
+            value = func(arg)
+            try:
+                cache.set(key, value)
+            except sqlite3.Error:
+                pass
+        return value
+
+    return wrapper
+
+
+# 镜像名称解析: [registry/]path[:tag][@digest]
+# 第一段包含 "." 或 ":" 时视为 registry（如 gcr.io、localhost:5000）
+_IMAGE_RE = re.compile(
+    r'^(?:(?P<registry>[^/]*[.:][^/]*)/)?'
+    r'(?P<path>[^:@]+)'
+    r'(?P<tag>:[^@/]+)?'
+    r'(?P<digest>@[A-Za-z0-9_+.-]+:[0-9a-fA-F]+)?$'
+)
+
+# 已配置加速映射的 registry（含加速源自身，映射为原样），按长度降序组成一个锚定的正则，
+# 一次匹配即可取出 registry 与其后的路径
+_REGISTRY_PREFIXES = {**REGISTRY_MIRRORS, DEFAULT_MIRROR: DEFAULT_MIRROR}
+_REGISTRY_RE = re.compile(
+    "^(" + "|".join(re.escape(r) for r in sorted(_REGISTRY_PREFIXES, key=len, reverse=True)) + ")/(.+)$"
+)
+
+
+def _is_registry(segment: str) -> bool:
+    """第一段包含 "." 或 ":" 时视为 registry（如 gcr.io、localhost:5000）"""
+    return '.' in segment or ':' in segment
+
+
+# 镜像名称标准化规则: (判断函数, 转换函数)，按顺序取第一个匹配的规则，都不匹配时保持原样
+_RULES = (
+    # 没有 registry 前缀和命名空间，例如: nginx:latest，添加 docker.io/library/
+    (lambda image: '/' not in image,
+     lambda image: f"docker.io/library/{image}"),
+    # 只有一层路径，例如: library/nginx, nginx/nginx，添加 docker.io/
+    (lambda image: image.count('/') == 1 and not _is_registry(image.split('/', 1)[0]),
+     lambda image: f"docker.io/{image}"),
+)
+
+
+@disk_cached
 def normalize_image_name(image: str) -> str:
     """
     标准化镜像名称，处理省略 docker.io 的情况
@@ -42,21 +359,29 @@ def normalize_image_name(image: str) -> str:
     Returns:
         str: 标准化的镜像名称
     """
-    # 如果没有 registry 前缀，默认添加 docker.io/library/
-    if '/' not in image:
-        return f"docker.io/library/{image}"
+    for predicate, transform in _RULES:
+        if predicate(image):
+            return transform(image)
+    return image
 
-    # 如果只有一层路径，可能是官方镜像，添加 docker.io/library/
-    parts = image.split('/')
-    if len(parts) == 2:
-        # 检查第一部分是否是 registry（包含点号）还是用户/组织名
-        if '.' not in parts[0] and ':' not in parts[0]:
-            # 例如: nginx:latest, python:3.9, library/nginx, nginx/nginx
-            return f"docker.io/{image}"
 
-    return image
+def canonical_reference(image: str) -> str:
+    """
+    补全隐含的 :latest 标签，使 nginx 与 docker.io/library/nginx:latest 得到相同的引用
+
+    Args:
+        image: 标准化后的镜像名称
+
+    Returns:
+        str: 带标签或摘要的镜像引用
+    """
+    if '@' in image or ':' in image.rsplit('/', 1)[-1]:
+        return image
+    return f"{image}:latest"
 
 
+# 结果可能包含 select_fastest_mirror 的探测结果，只在进程内缓存
+@functools.lru_cache(maxsize=8192)
 def convert_to_mirror_image(image: str) -> Optional[str]:
     """
     将原始镜像地址转换为 DaoCloud 加速镜像地址
@@ -67,62 +392,249 @@ def convert_to_mirror_image(image: str) -> Optional[str]:
     Returns:
         Optional[str]: 加速镜像地址，如果不支持则返回 None
     """
-    # 提取 registry 部分
-    parts = image.split('/', 1)
-    if len(parts) < 2:
+    # 支持的镜像源（已经是 m.daocloud.io 格式时原样返回）
+    match = _REGISTRY_RE.match(image)
+    if match:
+        return f"{_REGISTRY_PREFIXES[match.group(1)]}/{match.group(2)}"
+
+    match = _IMAGE_RE.match(image)
+    if match is None or '/' not in image:
         return None
 
-    registry = parts[0]
-    rest = parts[1] if len(parts) > 1 else ""
+    registry = match.group('registry')
+    if registry is None:
+        # 第一段不是 registry 地址，默认添加 m.daocloud.io 前缀
+        return f"{DEFAULT_MIRROR}/{image}"
 
-    # 检查是否在支持的镜像源中
-    if registry in REGISTRY_MIRRORS:
-        mirror_registry = REGISTRY_MIRRORS[registry]
-        return f"{mirror_registry}/{rest}" if rest else mirror_registry
+    rest = image[len(registry) + 1:]
 
-    # 如果已经是 m.daocloud.io 格式，直接返回
-    if image.startswith("m.daocloud.io/"):
-        return image
+    # 其余 registry 选择响应最快的源（加速源或直连）
+    mirror_prefix = select_fastest_mirror(registry)
+    return f"{mirror_prefix}/{rest}"
 
-    # 默认添加 m.daocloud.io 前缀（支持所有镜像）
-    return f"m.daocloud.io/{image}"
 
+def _probe_registry(candidate: str) -> str:
+    """
+    探测镜像源的 /v2/ 接口是否可达
 
-def run_command(command: list, check: bool = True) -> Tuple[int, str, str]:
+    Args:
+        candidate: 镜像源前缀，如 m.daocloud.io/ghcr.io
+
+    Returns:
+        str: 可达时返回 candidate 本身，否则抛出异常
     """
-    执行 shell 命令
+    host = candidate.split('/', 1)[0]
+    request = urllib.request.Request(f"https://{host}/v2/", method="HEAD")
+    try:
+        urllib.request.urlopen(request, timeout=MIRROR_PROBE_TIMEOUT).close()
+    except urllib.error.HTTPError:
+        # 401 等 HTTP 错误说明服务可达，仅是需要认证
+        pass
+    return candidate
+
+
+def select_fastest_mirror(registry: str) -> str:
+    """
+    并发探测加速源与原始 registry，选择最先响应的一个
+
+    结果按 registry 缓存；全部探测失败时使用默认加速源。
 
     Args:
-        command: 命令列表
-        check: 是否检查返回码
+        registry: 原始 registry，如 ghcr.io
 
     Returns:
-        Tuple[int, str, str]: (返回码, 标准输出, 标准错误)
+        str: 镜像地址前缀（加速源前缀或 registry 本身）
     """
+    default = f"{DEFAULT_MIRROR}/{registry}"
+
+    # 不像主机名的第一段（如 user/repo/name 中的 user）无需探测
+    if '.' not in registry and ':' not in registry:
+        return default
+
+    with _fastest_mirror_lock:
+        if registry in _fastest_mirror_cache:
+            return _fastest_mirror_cache[registry]
+
+    candidates = [default, registry]
+    selected = default
+    executor = ThreadPoolExecutor(max_workers=len(candidates))
     try:
-        result = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            check=check
+        futures = [executor.submit(_probe_registry, c) for c in candidates]
+        for future in as_completed(futures):
+            if future.exception() is None:
+                selected = future.result()
+                break
+    finally:
+        # 不等待较慢的探测结束
+        executor.shutdown(wait=False)
+
+    with _fastest_mirror_lock:
+        _fastest_mirror_cache[registry] = selected
+    return selected
+
+
+def _manifest_url(image: str) -> Optional[str]:
+    """
+    生成镜像 manifest 的 Registry API 地址
+
+    Args:
+        image: 完整镜像地址，如 m.daocloud.io/docker.io/library/nginx:latest
+
+    Returns:
+        Optional[str]: manifest URL，无法解析时返回 None
+    """
+    if '/' not in image:
+        return None
+    host, remainder = image.split('/', 1)
+
+    if '@' in remainder:
+        repository, reference = remainder.split('@', 1)
+        # repo:tag@digest 按摘要拉取，去掉仓库路径中的标签
+        name, sep, tag = repository.rpartition(':')
+        if sep and '/' not in tag:
+            repository = name
+    else:
+        repository, sep, tag = remainder.rpartition(':')
+        if not sep or '/' in tag:
+            repository, tag = remainder, "latest"
+        reference = tag
+
+    return f"https://{host}/v2/{repository}/manifests/{reference}"
+
+
+async def _head_manifests(urls: List[str]) -> List[Optional[int]]:
+    """
+    通过同一个 HTTP/2 连接并发发送 manifest HEAD 请求
+
+    Args:
+        urls: manifest URL 列表
+
+    Returns:
+        List[Optional[int]]: 各请求的 HTTP 状态码，请求失败时为 None
+    """
+    async with httpx.AsyncClient(http2=True, timeout=MANIFEST_CHECK_TIMEOUT,
+                                 headers={"Accept": MANIFEST_ACCEPT}) as client:
+        responses = await asyncio.gather(
+            *[client.head(url) for url in urls],
+            return_exceptions=True
         )
-        return result.returncode, result.stdout, result.stderr
-    except subprocess.CalledProcessError as e:
-        return e.returncode, e.stdout, e.stderr
+    return [None if isinstance(r, Exception) else r.status_code for r in responses]
+
+
+def validate_mirrors(mirror_images: List[str]) -> Dict[str, bool]:
+    """
+    批量校验加速镜像是否存在
+
+    仅当 HEAD 请求明确返回 404 时视为不存在；网络错误、需要认证等情况视为存在，
+    交由 docker pull 处理。未安装 httpx（及 h2）时不做校验。
+
+    Args:
+        mirror_images: 加速镜像地址列表
+
+    Returns:
+        Dict[str, bool]: 加速镜像地址 -> 是否存在
+    """
+    result = {image: True for image in mirror_images}
+    if httpx is None or not mirror_images:
+        return result
+
+    urls = {image: _manifest_url(image) for image in result}
+    urls = {image: url for image, url in urls.items() if url}
+
+    try:
+        statuses = asyncio.run(_head_manifests(list(urls.values())))
+    except ImportError:
+        # http2=True 需要 h2 包
+        return result
+
+    for image, status in zip(urls, statuses):
+        result[image] = status != 404
+    return result
+
+
+def run_command(command: list, check: bool = True) -> Tuple[int, str, str]:
+    """
+    执行 shell 命令，实时输出命令日志
+
+    标准错误合并到标准输出，逐行转发到终端，只保留最后 OUTPUT_TAIL_LINES 行，
+    长时间运行的命令（如 docker pull）不会在内存中累积全部输出。
+
+    Args:
+        command: 命令列表
+        check: 是否检查返回码（返回码总是通过返回值给出，不会抛出异常）
+
+    Returns:
+        Tuple[int, str, str]: (返回码, 标准输出, 标准错误)；
+        失败时标准错误为输出尾部，成功时为空字符串
+    """
+    tail = deque(maxlen=OUTPUT_TAIL_LINES)
+    with subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        close_fds=_CLOSE_FDS
+    ) as proc:
+        for line in proc.stdout:
+            line = line.rstrip('\n')
+            log(line)
+            tail.append(line)
+        returncode = proc.wait()
+
+    output = "\n".join(tail)
+    return returncode, output, output if returncode != 0 else ""
+
+
+def _get_docker_client():
+    """
+    获取 Docker SDK 客户端，首次使用时通过 docker.from_env() 创建
+
+    Returns:
+        docker.DockerClient: 客户端；未安装 SDK 或无法连接 daemon 时返回 None
+    """
+    global _docker_client, _docker_client_disabled
+    if docker is None or _docker_client_disabled:
+        return None
+
+    with _docker_client_lock:
+        if _docker_client is None and not _docker_client_disabled:
+            try:
+                _docker_client = docker.from_env()
+            except docker.errors.DockerException:
+                # 例如 DOCKER_HOST 配置不被 SDK 支持，退回命令行
+                _docker_client_disabled = True
+        return _docker_client
 
 
 def pull_image(image: str) -> Tuple[int, str, str]:
     """
     拉取 Docker 镜像
 
+    成功时标准输出为拉取到的镜像：使用 Docker SDK 时为镜像 ID，
+    使用命令行时为 docker pull --quiet 输出的镜像引用。
+
     Args:
         image: 镜像地址
 
     Returns:
         Tuple[int, str, str]: (返回码, 标准输出, 标准错误)
     """
-    print(f"[INFO] Pulling image: {image}")
-    return run_command(["docker", "pull", image], check=True)
+    logger.info("Pulling image: %s", image)
+
+    client = _get_docker_client()
+    if client is not None:
+        try:
+            pulled = client.images.pull(image)
+        except docker.errors.DockerException as e:
+            return 1, "", str(e)
+        return 0, pulled.id, ""
+
+    # --quiet 不输出逐层进度，减少需要转发的日志；最后一行为拉取到的镜像引用
+    returncode, stdout, stderr = run_command([_DOCKER, "pull", "--quiet", image], check=True)
+    if returncode == 0:
+        stdout = stdout.rsplit("\n", 1)[-1].strip()
+    return returncode, stdout, stderr
 
 
 def tag_image(source: str, target: str) -> Tuple[int, str, str]:
@@ -136,8 +648,18 @@ def tag_image(source: str, target: str) -> Tuple[int, str, str]:
     Returns:
         Tuple[int, str, str]: (返回码, 标准输出, 标准错误)
     """
-    print(f"[INFO] Tagging: {source} -> {target}")
-    return run_command(["docker", "tag", source, target], check=True)
+    logger.info("Tagging: %s -> %s", source, target)
+
+    client = _get_docker_client()
+    if client is not None:
+        repository, tag = docker.utils.parse_repository_tag(target)
+        try:
+            client.api.tag(source, repository, tag)
+        except docker.errors.DockerException as e:
+            return 1, "", str(e)
+        return 0, "", ""
+
+    return run_command([_DOCKER, "tag", source, target], check=True)
 
 
 def remove_image(image: str) -> Tuple[int, str, str]:
@@ -150,100 +672,574 @@ def remove_image(image: str) -> Tuple[int, str, str]:
     Returns:
         Tuple[int, str, str]: (返回码, 标准输出, 标准错误)
     """
-    print(f"[INFO] Removing mirror tag: {image}")
-    return run_command(["docker", "rmi", image], check=False)
+    logger.info("Removing mirror tag: %s", image)
 
+    client = _get_docker_client()
+    if client is not None:
+        try:
+            client.images.remove(image)
+        except docker.errors.DockerException as e:
+            return 1, "", str(e)
+        return 0, "", ""
 
-def accelerate_pull(original_image: str) -> bool:
+    return run_command([_DOCKER, "rmi", image], check=False)
+
+
+def tag_and_cleanup(mirror: str, target: str, source: Optional[str] = None) -> Tuple[int, str, str]:
     """
-    使用加速源拉取镜像并重命名
+    为加速镜像打上目标标签并删除加速镜像标签，合并为一次 sh -c 调用
+
+    打标签失败时不会删除加速镜像标签。使用 Docker SDK 或在 Windows 上时
+    分别调用 tag_image 与 remove_image。
 
     Args:
-        original_image: 原始镜像名称
+        mirror: 加速镜像地址
+        target: 目标镜像地址
+        source: 打标签使用的镜像（如 pull_image 返回的镜像 ID），默认为 mirror
+
+    Returns:
+        Tuple[int, str, str]: (返回码, 标准输出, 标准错误)
+    """
+    source = source or mirror
+    if _get_docker_client() is not None or sys.platform == "win32":
+        returncode, stdout, stderr = tag_image(source, target)
+        if returncode != 0:
+            return returncode, stdout, stderr
+        return remove_image(mirror)
+
+    logger.info("Tagging: %s -> %s", source, target)
+    logger.info("Removing mirror tag: %s", mirror)
+    docker_bin = shlex.quote(_DOCKER)
+    script = (f"{docker_bin} tag {shlex.quote(source)} {shlex.quote(target)} "
+              f"&& {docker_bin} rmi {shlex.quote(mirror)}")
+    return run_command(["sh", "-c", script], check=True)
+
+
+def fast_retag(mirror: str, target: str) -> Tuple[int, str, str]:
+    """
+    在 registry 端将加速镜像的 manifest 复制为目标标签，不下载镜像层到本地
+
+    需要对目标 registry 有推送权限。
+
+    Args:
+        mirror: 加速镜像地址
+        target: 目标镜像地址
+
+    Returns:
+        Tuple[int, str, str]: (返回码, 标准输出, 标准错误)
+    """
+    logger.info("Copying manifest: %s -> %s", mirror, target)
+    return run_command([_DOCKER, "buildx", "imagetools", "create", "--tag", target, mirror], check=True)
+
+
+def _check_daemon_config() -> None:
+    """
+    检查 dockerd 的 max-concurrent-downloads 配置，过低时给出调优提示
+
+    仅在 Linux 上读取 /etc/docker/daemon.json，读取失败时不提示。
+    """
+    if not sys.platform.startswith("linux"):
+        return
+
+    try:
+        with open(DAEMON_CONFIG_PATH, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        config = {}
+    except (OSError, ValueError):
+        return
+
+    concurrent_downloads = config.get("max-concurrent-downloads", 3)
+    if isinstance(concurrent_downloads, int) and concurrent_downloads < RECOMMENDED_CONCURRENT_DOWNLOADS:
+        logger.info("Tip: dockerd max-concurrent-downloads is %s; set it to >= %s in %s "
+                    "and restart docker to download more layers in parallel",
+                    concurrent_downloads, RECOMMENDED_CONCURRENT_DOWNLOADS, DAEMON_CONFIG_PATH)
+        log()
+
+
+def install_daemon_config() -> bool:
+    """
+    将 DaoCloud 加速源合并到 /etc/docker/daemon.json 并重新加载 dockerd
+
+    保留已有配置；文件不存在时新建。写入使用临时文件 + os.replace，保证原子性。
+    配置后 docker.io 镜像可直接 docker pull，无需本脚本的拉取/重命名流程。
+    仅支持 Linux；Docker Desktop 需要在其设置中配置。
 
     Returns:
         bool: 是否成功
     """
+    if not sys.platform.startswith("linux"):
+        logger.error("--install-daemon-config only supports Linux. For Docker Desktop, add "
+                     "\"registry-mirrors\": [\"%s\"] under Settings -> Docker Engine and apply",
+                     DAEMON_REGISTRY_MIRROR)
+        return False
+
     try:
-        # 1. 标准化镜像名称
-        normalized_image = normalize_image_name(original_image)
-        print(f"[INFO] Original image: {original_image}")
-        print(f"[INFO] Normalized: {normalized_image}")
+        with open(DAEMON_CONFIG_PATH, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        config = {}
+    except (OSError, ValueError) as e:
+        logger.error("Failed to read %s: %s", DAEMON_CONFIG_PATH, e)
+        return False
+
+    # 已有配置格式不符合预期时不做修改，避免覆盖用户配置
+    mirrors = config.get("registry-mirrors", []) if isinstance(config, dict) else None
+    concurrent_downloads = config.get("max-concurrent-downloads", 3) if isinstance(config, dict) else None
+    if (not isinstance(mirrors, list)
+            or not isinstance(concurrent_downloads, int) or isinstance(concurrent_downloads, bool)):
+        logger.error("Unexpected content in %s (registry-mirrors must be a list and "
+                     "max-concurrent-downloads an integer), please update it manually",
+                     DAEMON_CONFIG_PATH)
+        return False
+
+    if DAEMON_REGISTRY_MIRROR not in mirrors:
+        mirrors.append(DAEMON_REGISTRY_MIRROR)
+    config["registry-mirrors"] = mirrors
+    config["max-concurrent-downloads"] = max(concurrent_downloads, RECOMMENDED_CONCURRENT_DOWNLOADS)
+
+    config_dir = os.path.dirname(DAEMON_CONFIG_PATH)
+    try:
+        os.makedirs(config_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=config_dir, prefix=".daemon.json.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(config, f, indent=2)
+                f.write("\n")
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, DAEMON_CONFIG_PATH)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        logger.error("Failed to write %s: %s", DAEMON_CONFIG_PATH, e)
+        return False
+
+    logger.log(SUCCESS, "Updated %s", DAEMON_CONFIG_PATH)
+
+    # registry-mirrors 与 max-concurrent-downloads 支持热加载，无需重启
+    try:
+        returncode, stdout, stderr = run_command(["systemctl", "reload", "docker"])
+    except OSError as e:
+        # 没有 systemd 的系统（如 Alpine、容器内）
+        returncode, stderr = 1, str(e)
+    if returncode != 0:
+        logger.error("Reload failed, please restart docker manually: %s", stderr)
+        return False
+
+    logger.log(SUCCESS, "Docker daemon reloaded")
+    return True
+
+
+def image_present_locally(image: str) -> Optional[str]:
+    """
+    查询本地镜像 ID
+
+    Args:
+        image: 镜像地址
+
+    Returns:
+        Optional[str]: 本地存在时返回镜像 ID，否则返回 None
+    """
+    client = _get_docker_client()
+    if client is not None:
+        try:
+            return client.images.get(image).id
+        except docker.errors.DockerException:
+            return None
+
+    result = subprocess.run(
+        [_DOCKER, "image", "inspect", "--format", "{{.Id}}", image],
+        capture_output=True,
+        text=True,
+        close_fds=_CLOSE_FDS
+    )
+    image_id = result.stdout.strip()
+    return image_id if result.returncode == 0 and image_id else None
+
 
-        # 2. 转换为加速镜像地址
+def plan_pull(normalized_image: str, aliases: List[str], dest: Optional[str] = None,
+              force: bool = False, daemon_mirror: bool = False) -> Dict:
+    """
+    确定镜像的拉取方式（不输出日志，不拉取）
+
+    Args:
+        normalized_image: 标准化后的镜像名称
+        aliases: 用户指定的、标准化后相同的原始镜像名称列表
+        dest: 目标仓库前缀（如 registry.example.com/team）；指定时不拉取到本地，
+            仅在 registry 端将加速镜像的 manifest 复制到该仓库
+        force: 本地已存在时是否仍重新拉取
+        daemon_mirror: dockerd 已配置 registry-mirrors 时，docker.io 镜像直接拉取
+
+    Returns:
+        Dict: 拉取计划，包含 action（unsupported/copy/present/daemon/mirror）、
+        mirror（加速镜像地址）、targets（目标镜像列表）、local_id（本地镜像 ID）
+    """
+    # 转换为加速镜像地址（已经是 m.daocloud.io 格式时无需转换）
+    if normalized_image.startswith(f"{DEFAULT_MIRROR}/"):
+        mirror_image = normalized_image
+    else:
         mirror_image = convert_to_mirror_image(normalized_image)
-        if not mirror_image:
-            print(f"[ERROR] Unsupported image source '{original_image}'")
+
+    # 如果原始镜像名就是标准化的，使用标准化名称；目标统一补全 :latest，
+    # 以便与加速镜像地址比较（否则 m.daocloud.io/x 会被打标签后删除唯一的标签）；重复的目标只保留一个
+    target_images = list(dict.fromkeys(
+        canonical_reference(alias if '/' in alias else normalize_image_name(alias)) for alias in aliases
+    ))
+    plan = {"action": "mirror", "mirror": mirror_image, "targets": target_images, "local_id": None}
+
+    if not mirror_image:
+        plan["action"] = "unsupported"
+    elif dest:
+        # 复制到指定仓库下，保留原始仓库路径（去掉 registry），避免不同来源的镜像重名
+        parts = normalized_image.split('/', 1)
+        path = parts[1] if len(parts) == 2 and _is_registry(parts[0]) else normalized_image
+        plan["action"] = "copy"
+        plan["targets"] = [f"{dest.rstrip('/')}/{path}"]
+    else:
+        # 所有目标镜像都已存在于本地时跳过拉取（--force 时总是拉取）
+        if not force:
+            local_ids = [image_present_locally(target_image) for target_image in target_images]
+            if all(local_ids):
+                plan["action"] = "present"
+                plan["local_id"] = local_ids[0]
+                return plan
+
+        # dockerd 的 registry-mirrors 只作用于 docker.io，直接拉取即可经过加速源
+        if daemon_mirror and normalized_image.startswith("docker.io/"):
+            plan["action"] = "daemon"
+
+    return plan
+
+
+def accelerate_pull_multi(normalized_image: str, aliases: List[str], dest: Optional[str] = None,
+                          force: bool = False, daemon_mirror: bool = False,
+                          plan: Optional[Dict] = None) -> bool:
+    """
+    使用加速源拉取一次镜像，并重命名为所有请求的镜像名
+
+    Args:
+        normalized_image: 标准化后的镜像名称
+        aliases: 用户指定的、标准化后相同的原始镜像名称列表
+        dest: 目标仓库前缀（如 registry.example.com/team）；指定时不拉取到本地，
+            仅在 registry 端将加速镜像的 manifest 复制到该仓库
+        force: 本地已存在时是否仍重新拉取
+        daemon_mirror: dockerd 已配置 registry-mirrors 时，docker.io 镜像直接拉取
+        plan: plan_pull 预先生成的拉取计划，为 None 时在此生成
+
+    Returns:
+        bool: 是否成功
+    """
+    try:
+        # 1. 标准化镜像名称
+        logger.info("Original image: %s", ", ".join(aliases))
+        logger.info("Normalized: %s", normalized_image)
+
+        # 2. 转换为加速镜像地址，确定拉取方式
+        if plan is None:
+            plan = plan_pull(normalized_image, aliases, dest, force, daemon_mirror)
+        mirror_image = plan["mirror"]
+        target_images = plan["targets"]
+
+        if plan["action"] == "unsupported":
+            logger.error("Unsupported image source '%s'", aliases[0])
             return False
 
-        print(f"[INFO] Mirror image: {mirror_image}")
+        logger.info("Mirror image: %s", mirror_image)
+
+        # 无需本地镜像时，直接在 registry 端复制 manifest，省去 pull/tag/rmi
+        if plan["action"] == "copy":
+            for target_image in target_images:
+                returncode, stdout, stderr = fast_retag(mirror_image, target_image)
+                if returncode != 0:
+                    logger.error("Manifest copy failed: %s", stderr)
+                    return False
+                log()
+                logger.log(SUCCESS, "Image '%s' copied from mirror successfully!", target_image)
+            return True
+
+        if plan["action"] == "present":
+            logger.info("Image already present locally (%s), skipping pull: %s",
+                        plan["local_id"][:19], ", ".join(target_images))
+            logger.info("Use --force to pull again")
+            return True
+
+        if plan["action"] == "daemon":
+            returncode, stdout, stderr = pull_image(target_images[0])
+            if returncode != 0:
+                logger.error("Pull failed: %s", stderr)
+                return False
+            for target_image in target_images[1:]:
+                returncode, stdout, stderr = tag_image(target_images[0], target_image)
+                if returncode != 0:
+                    logger.warning("Rename warning: %s", stderr)
+            for target_image in target_images:
+                log()
+                logger.log(SUCCESS, "Image '%s' pulled via daemon mirror successfully!", target_image)
+            return True
 
         # 3. 使用加速源拉取镜像
         returncode, stdout, stderr = pull_image(mirror_image)
         if returncode != 0:
-            print(f"[ERROR] Pull failed: {stderr}")
+            logger.error("Pull failed: %s", stderr)
             return False
 
-        print(f"[SUCCESS] Pull completed")
+        logger.log(SUCCESS, "Pull completed")
+
+        # 目标镜像就是加速镜像时，无需重命名和清理
+        if target_images == [mirror_image]:
+            log()
+            logger.log(SUCCESS, "Image '%s' pulled successfully!", mirror_image)
+            return True
+
+        # 按拉取结果（镜像 ID 或镜像引用）打标签，不受其他进程同时改动加速镜像标签的影响
+        pulled_image = stdout or mirror_image
 
         # 4. 重命名为原始镜像名
-        # 如果原始镜像名就是标准化的，使用标准化名称
-        target_image = original_image if '/' in original_image else normalized_image
+        # 需要删除加速镜像标签时（标签名不同），最后一次重命名与删除合并为一条命令
+        cleanup = mirror_image not in target_images
+        rename_images = [t for t in target_images if t != mirror_image]
+        for target_image in (rename_images[:-1] if cleanup else rename_images):
+            returncode, stdout, stderr = tag_image(pulled_image, target_image)
+            if returncode != 0:
+                logger.warning("Rename warning: %s", stderr)
+                # 重命名失败不影响结果，镜像已经拉取成功
+            else:
+                logger.log(SUCCESS, "Rename completed")
 
-        returncode, stdout, stderr = tag_image(mirror_image, target_image)
-        if returncode != 0:
-            print(f"[WARNING] Rename warning: {stderr}")
-            # 重命名失败不影响结果，镜像已经拉取成功
-        else:
-            print(f"[SUCCESS] Rename completed")
-
-        # 5. 删除加速镜像标签（如果标签名不同）
-        if mirror_image != target_image:
-            returncode, stdout, stderr = remove_image(mirror_image)
+        # 5. 重命名并删除加速镜像标签
+        if cleanup:
+            returncode, stdout, stderr = tag_and_cleanup(mirror_image, target_images[-1], pulled_image)
             if returncode != 0:
-                print(f"[WARNING] Cleanup warning: {stderr}")
+                logger.warning("Rename/cleanup warning: %s", stderr)
             else:
-                print(f"[SUCCESS] Cleanup completed")
+                logger.log(SUCCESS, "Rename and cleanup completed")
 
-        print(f"\n[SUCCESS] Image '{target_image}' pulled and configured successfully!")
+        for target_image in target_images:
+            log()
+            logger.log(SUCCESS, "Image '%s' pulled and configured successfully!", target_image)
         return True
 
     except Exception as e:
-        print(f"[ERROR] Exception occurred: {e}")
+        logger.error("Exception occurred: %s", e)
         return False
 
 
+def accelerate_pull(original_image: str, dest: Optional[str] = None, force: bool = False,
+                    daemon_mirror: bool = False) -> bool:
+    """
+    使用加速源拉取镜像并重命名
+
+    Args:
+        original_image: 原始镜像名称
+        dest: 目标仓库前缀（如 registry.example.com/team）；指定时不拉取到本地，
+            仅在 registry 端将加速镜像的 manifest 复制到该仓库
+        force: 本地已存在时是否仍重新拉取
+        daemon_mirror: dockerd 已配置 registry-mirrors 时，docker.io 镜像直接拉取
+
+    Returns:
+        bool: 是否成功
+    """
+    return accelerate_pull_multi(normalize_image_name(original_image), [original_image],
+                                 dest, force, daemon_mirror)
+
+
+def _plan_pull_or_none(normalized_image: str, aliases: List[str], **options) -> Optional[Dict]:
+    """
+    生成拉取计划，出错时返回 None（由 accelerate_pull_multi 重新生成并报告错误）
+
+    Args:
+        normalized_image: 标准化后的镜像名称
+        aliases: 对应的原始镜像名称列表
+        **options: 传递给 plan_pull 的其他参数
+
+    Returns:
+        Optional[Dict]: 拉取计划
+    """
+    try:
+        return plan_pull(normalized_image, aliases, **options)
+    except Exception:
+        return None
+
+
+def _accelerate_pull_grouped(normalized_image: str, aliases: List[str],
+                             plan: Optional[Dict] = None, **options) -> bool:
+    """
+    在工作线程中拉取镜像，日志缓存后一次性输出
+
+    Args:
+        normalized_image: 标准化后的镜像名称
+        aliases: 对应的原始镜像名称列表
+        plan: plan_pull 预先生成的拉取计划
+        **options: 传递给 accelerate_pull_multi 的其他参数
+
+    Returns:
+        bool: 是否成功
+    """
+    _thread_local.buffer = []
+    try:
+        log(f"\n{'=' * 60}")
+        return accelerate_pull_multi(normalized_image, aliases, plan=plan, **options)
+    finally:
+        records, _thread_local.buffer = _thread_local.buffer, None
+        # 持锁连续放入队列，保证同一镜像的日志不与其他镜像交错
+        with _output_lock:
+            for record in records:
+                logger.handle(record)
+
+
 def main():
     """主函数"""
-    if len(sys.argv) < 2:
-        print("用法: python accelerate_docker_pull.py <镜像名称> [镜像名称2] ...")
-        print("\n示例:")
-        print("  python accelerate_docker_pull.py nginx:latest")
-        print("  python accelerate_docker_pull.py gcr.io/pause:3.1")
-        print("  python accelerate_docker_pull.py python:3.9-slim")
-        sys.exit(1)
-
-    images = sys.argv[1:]
-
-    print("=" * 60)
-    print("[INFO] Docker Image Accelerator")
-    print("[INFO] Using DaoCloud mirror for acceleration")
-    print("=" * 60)
-    print()
-
-    success_count = 0
-    failed_count = 0
-
-    for image in images:
-        print(f"\n{'=' * 60}")
-        if accelerate_pull(image):
-            success_count += 1
-        else:
-            failed_count += 1
-
-    print(f"\n{'=' * 60}")
-    print(f"[SUMMARY] Success: {success_count}, Failed: {failed_count}")
-    print(f"{'=' * 60}\n")
+    parser = argparse.ArgumentParser(
+        description="使用 DaoCloud 国内镜像源加速拉取 Docker 镜像",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  python accelerate_docker_pull.py nginx:latest
+  python accelerate_docker_pull.py gcr.io/pause:3.1
+  python accelerate_docker_pull.py python:3.9-slim
+  python accelerate_docker_pull.py --jobs 4 nginx redis:7 python:3.9
+  python accelerate_docker_pull.py --no-local --dest registry.example.com/team nginx:1.25
+  python accelerate_docker_pull.py --cache-dir .accel-cache nginx redis:7
+  sudo python accelerate_docker_pull.py --install-daemon-config
+  python accelerate_docker_pull.py --use-daemon-mirror nginx gcr.io/pause:3.1
+        """
+    )
+    parser.add_argument(
+        "images",
+        nargs="*",
+        metavar="IMAGE",
+        help="镜像名称，可指定多个"
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"并发拉取的镜像数（默认: {DEFAULT_WORKERS}，可用环境变量 ACCEL_WORKERS 设置），"
+             "建议与 daemon.json 中的 max-concurrent-downloads 保持一致"
+    )
+    parser.add_argument(
+        "--no-local",
+        action="store_true",
+        help="不拉取到本地，使用 docker buildx imagetools 在 registry 端将 manifest 复制到 --dest"
+             "（需要对目标 registry 有推送权限）"
+    )
+    parser.add_argument(
+        "--dest",
+        metavar="REGISTRY/NAMESPACE",
+        help="--no-local 的目标仓库前缀，例如 registry.example.com/team，"
+             "nginx:1.25 将复制为 registry.example.com/team/library/nginx:1.25"
+    )
+    parser.add_argument(
+        "--force", "-f",
+        action="store_true",
+        help="本地已存在镜像时仍重新拉取（用于更新 latest 等可变标签）"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help=f"镜像名称标准化结果的磁盘缓存目录（默认: {CACHE_DIR}，可用环境变量 ACCEL_CACHE 设置，"
+             "需要安装 diskcache）"
+    )
+    parser.add_argument(
+        "--install-daemon-config",
+        action="store_true",
+        help=f"将加速源 {DAEMON_REGISTRY_MIRROR} 合并到 {DAEMON_CONFIG_PATH} 并重新加载 dockerd"
+             "（需要 root 权限），之后 docker.io 镜像可直接 docker pull"
+    )
+    parser.add_argument(
+        "--use-daemon-mirror",
+        action="store_true",
+        help="dockerd 已配置 registry-mirrors 时，docker.io 镜像直接拉取，跳过加速地址拉取与重命名"
+    )
+    args = parser.parse_args()
+
+    # 退出时停止监听线程，输出队列中剩余的日志
+    atexit.register(setup_logging().stop)
+
+    if args.install_daemon_config:
+        sys.exit(0 if install_daemon_config() else 1)
+
+    if not args.images:
+        parser.error("the following arguments are required: IMAGE")
+
+    if args.cache_dir:
+        set_cache_dir(args.cache_dir)
+
+    if args.no_local and not args.dest:
+        parser.error("--no-local requires --dest (the registry to copy the image into)")
+    if args.dest and not args.no_local:
+        parser.error("--dest can only be used with --no-local")
+
+    options = {"dest": args.dest if args.no_local else None, "force": args.force,
+               "daemon_mirror": args.use_daemon_mirror}
+
+    # 按规范引用去重，相同镜像只拉取一次，再重命名为各个原始名称
+    groups: Dict[str, List[str]] = {}
+    for image in args.images:
+        aliases = groups.setdefault(canonical_reference(normalize_image_name(image)), [])
+        if image not in aliases:
+            aliases.append(image)
+
+    log("=" * 60)
+    logger.info("Docker Image Accelerator")
+    logger.info("Using DaoCloud mirror for acceleration")
+    log("=" * 60)
+    log()
+
+    _check_daemon_config()
+
+    jobs = max(1, min(args.jobs, len(groups)))
+
+    # 并发确定各镜像的拉取方式（镜像源探测、本地镜像检查互相重叠）
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        planner = functools.partial(_plan_pull_or_none, **options)
+        plans = dict(zip(groups, executor.map(planner, groups.keys(), groups.values())))
+
+    # 不同写法指向同一加速镜像时（如 nginx 与 m.daocloud.io/docker.io/library/nginx）合并为一组，
+    # 避免同一加速镜像被重复拉取，或其标签被另一组清理掉
+    first_by_mirror: Dict[str, str] = {}
+    merged = set()
+    for normalized_image, plan in list(plans.items()):
+        if not plan or not plan["mirror"]:
+            continue
+        first = first_by_mirror.setdefault(plan["mirror"], normalized_image)
+        if first != normalized_image:
+            groups[first].extend(a for a in groups.pop(normalized_image) if a not in groups[first])
+            del plans[normalized_image]
+            merged.add(first)
+    for normalized_image in merged:
+        plans[normalized_image] = _plan_pull_or_none(normalized_image, groups[normalized_image], **options)
+
+    # 只对需要经加速源拉取的镜像批量校验是否存在，跳过必然失败的 docker pull
+    results = []
+    mirror_plans = {image: plan for image, plan in plans.items() if plan and plan["action"] == "mirror"}
+    existing = validate_mirrors(list(dict.fromkeys(plan["mirror"] for plan in mirror_plans.values())))
+    for normalized_image, plan in mirror_plans.items():
+        if not existing[plan["mirror"]]:
+            logger.error("Mirror image not found: %s (%s)",
+                         plan["mirror"], ", ".join(groups.pop(normalized_image)))
+            results.append(False)
+    if results:
+        log()
+
+    group_plans = [plans[image] for image in groups]
+    if jobs == 1:
+        # 单个并发时直接输出，保持实时日志
+        for (normalized_image, aliases), plan in zip(groups.items(), group_plans):
+            log(f"\n{'=' * 60}")
+            results.append(accelerate_pull_multi(normalized_image, aliases, plan=plan, **options))
+    else:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            worker = functools.partial(_accelerate_pull_grouped, **options)
+            results.extend(executor.map(worker, groups.keys(), groups.values(), group_plans))
+
+    success_count = sum(1 for ok in results if ok)
+    failed_count = len(results) - success_count
+
+    log(f"\n{'=' * 60}")
+    log(f"[SUMMARY] Success: {success_count}, Failed: {failed_count}")
+    log(f"{'=' * 60}\n")
 
     sys.exit(0 if failed_count == 0 else 1)
 
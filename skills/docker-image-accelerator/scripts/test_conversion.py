@@ -5,66 +5,106 @@
 """
 
 import sys
-sys.path.insert(0, '.')
-
-from accelerate_docker_pull import normalize_image_name, convert_to_mirror_image
-
-
-def test_conversion():
-    """测试镜像名称转换"""
-
-    test_cases = [
-        # (输入, 标准化后, 加速地址)
-        ("nginx:latest", "docker.io/library/nginx:latest", "m.daocloud.io/docker.io/library/nginx:latest"),
-        ("redis:7", "docker.io/library/redis:7", "m.daocloud.io/docker.io/library/redis:7"),
-        ("python:3.9-slim", "docker.io/library/python:3.9-slim", "m.daocloud.io/docker.io/library/python:3.9-slim"),
-        ("gcr.io/pause:3.1", "gcr.io/pause:3.1", "m.daocloud.io/gcr.io/pause:3.1"),
-        ("k8s.gcr.io/pause:3.1", "k8s.gcr.io/pause:3.1", "m.daocloud.io/k8s.gcr.io/pause:3.1"),
-        ("ghcr.io/actions/runner:latest", "ghcr.io/actions/runner:latest", "m.daocloud.io/ghcr.io/actions/runner:latest"),
-        ("quay.io/coreos/latest:latest", "quay.io/coreos/latest:latest", "m.daocloud.io/quay.io/coreos/latest:latest"),
-        ("docker.io/library/nginx:latest", "docker.io/library/nginx:latest", "m.daocloud.io/docker.io/library/nginx:latest"),
-    ]
-
-    print("=" * 80)
-    print("镜像名称转换测试")
-    print("=" * 80)
-    print()
-
-    all_passed = True
-
-    for i, (input_img, expected_normalized, expected_mirror) in enumerate(test_cases, 1):
-        print(f"测试 {i}: {input_img}")
-        print("-" * 80)
-
-        # 标准化
-        normalized = normalize_image_name(input_img)
-        normalized_ok = normalized == expected_normalized
-        print(f"  标准化: {normalized}")
-        print(f"  期望值: {expected_normalized}")
-        print(f"  结果: {'[PASS]' if normalized_ok else '[FAIL]'}")
-
-        # 转换
-        mirror = convert_to_mirror_image(normalized)
-        mirror_ok = mirror == expected_mirror
-        print(f"  加速地址: {mirror}")
-        print(f"  期望值: {expected_mirror}")
-        print(f"  结果: {'[PASS]' if mirror_ok else '[FAIL]'}")
-
-        if not (normalized_ok and mirror_ok):
-            all_passed = False
-
-        print()
-
-    print("=" * 80)
-    if all_passed:
-        print("[SUCCESS] All tests passed!")
-    else:
-        print("[FAILURE] Some tests failed!")
-    print("=" * 80)
-
-    return all_passed
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import accelerate_docker_pull
+from accelerate_docker_pull import normalize_image_name, convert_to_mirror_image, set_cache_dir
+
+# 关闭磁盘缓存，避免读到旧版本代码写入的结果
+set_cache_dir(None)
+
+
+TEST_CASES = [
+    # (输入, 标准化后, 加速地址)
+    ("nginx:latest", "docker.io/library/nginx:latest", "m.daocloud.io/docker.io/library/nginx:latest"),
+    ("redis:7", "docker.io/library/redis:7", "m.daocloud.io/docker.io/library/redis:7"),
+    ("python:3.9-slim", "docker.io/library/python:3.9-slim", "m.daocloud.io/docker.io/library/python:3.9-slim"),
+    ("gcr.io/pause:3.1", "gcr.io/pause:3.1", "m.daocloud.io/gcr.io/pause:3.1"),
+    ("k8s.gcr.io/pause:3.1", "k8s.gcr.io/pause:3.1", "m.daocloud.io/k8s.gcr.io/pause:3.1"),
+    ("ghcr.io/actions/runner:latest", "ghcr.io/actions/runner:latest", "m.daocloud.io/ghcr.io/actions/runner:latest"),
+    ("quay.io/coreos/latest:latest", "quay.io/coreos/latest:latest", "m.daocloud.io/quay.io/coreos/latest:latest"),
+    ("docker.io/library/nginx:latest", "docker.io/library/nginx:latest", "m.daocloud.io/docker.io/library/nginx:latest"),
+    # *.m.daocloud.io 别名映射到 m.daocloud.io 前缀
+    ("docker.m.daocloud.io/x", "docker.m.daocloud.io/x", "m.daocloud.io/docker.io/x"),
+    ("ghcr.m.daocloud.io/owner/img:v1", "ghcr.m.daocloud.io/owner/img:v1", "m.daocloud.io/ghcr.io/owner/img:v1"),
+    # 已经是加速地址，原样返回
+    ("m.daocloud.io/docker.io/library/nginx:1.25", "m.daocloud.io/docker.io/library/nginx:1.25",
+     "m.daocloud.io/docker.io/library/nginx:1.25"),
+    # 摘要引用
+    ("nginx@sha256:" + "a" * 64, "docker.io/library/nginx@sha256:" + "a" * 64,
+     "m.daocloud.io/docker.io/library/nginx@sha256:" + "a" * 64),
+    ("gcr.io/pause:3.1@sha256:" + "b" * 64, "gcr.io/pause:3.1@sha256:" + "b" * 64,
+     "m.daocloud.io/gcr.io/pause:3.1@sha256:" + "b" * 64),
+    # 三段路径且第一段不是 registry
+    ("user/repo/name:1.0", "user/repo/name:1.0", "m.daocloud.io/user/repo/name:1.0"),
+]
+
+
+@pytest.mark.parametrize("input_img,expected_norm,expected_mirror", TEST_CASES)
+def test_case(input_img, expected_norm, expected_mirror):
+    """测试镜像名称标准化与加速地址转换"""
+    normalized = normalize_image_name(input_img)
+    assert normalized == expected_norm
+    assert convert_to_mirror_image(normalized) == expected_mirror
+
+
+def test_unknown_registry_uses_fastest_mirror(monkeypatch):
+    """未配置的 registry 使用 select_fastest_mirror 的结果（此处替换掉网络探测）"""
+    monkeypatch.setattr(accelerate_docker_pull, "select_fastest_mirror", lambda registry: registry)
+    convert_to_mirror_image.cache_clear()
+    try:
+        assert normalize_image_name("localhost:5000/foo") == "localhost:5000/foo"
+        assert convert_to_mirror_image("localhost:5000/foo") == "localhost:5000/foo"
+    finally:
+        convert_to_mirror_image.cache_clear()
+
+
+@pytest.mark.parametrize("image,expected_url", [
+    # 标签
+    ("m.daocloud.io/docker.io/library/nginx:1.25",
+     "https://m.daocloud.io/v2/docker.io/library/nginx/manifests/1.25"),
+    # 省略标签
+    ("m.daocloud.io/docker.io/library/nginx",
+     "https://m.daocloud.io/v2/docker.io/library/nginx/manifests/latest"),
+    # 摘要
+    ("m.daocloud.io/gcr.io/pause@sha256:" + "b" * 64,
+     "https://m.daocloud.io/v2/gcr.io/pause/manifests/sha256:" + "b" * 64),
+    # 标签 + 摘要
+    ("m.daocloud.io/gcr.io/pause:3.1@sha256:" + "b" * 64,
+     "https://m.daocloud.io/v2/gcr.io/pause/manifests/sha256:" + "b" * 64),
+    # 带端口的 registry
+    ("m.daocloud.io/localhost:5000/foo:1",
+     "https://m.daocloud.io/v2/localhost:5000/foo/manifests/1"),
+    ("m.daocloud.io/localhost:5000/foo",
+     "https://m.daocloud.io/v2/localhost:5000/foo/manifests/latest"),
+    ("m.daocloud.io/localhost:5000/foo:1@sha256:" + "c" * 64,
+     "https://m.daocloud.io/v2/localhost:5000/foo/manifests/sha256:" + "c" * 64),
+])
+def test_manifest_url(image, expected_url):
+    """测试 manifest URL 生成"""
+    assert accelerate_docker_pull._manifest_url(image) == expected_url
+
+def test_mirror_reference_input_is_not_removed(monkeypatch):
+    """直接传入加速地址（省略 :latest）时只拉取，不打标签也不删除"""
+    commands = []
+
+    def fake_run_command(command, check=True):
+        commands.append(command[1:])
+        return 0, command[-1], ""
+
+    monkeypatch.setattr(accelerate_docker_pull, "run_command", fake_run_command)
+    monkeypatch.setattr(accelerate_docker_pull, "image_present_locally", lambda image: None)
+    monkeypatch.setattr(accelerate_docker_pull, "_get_docker_client", lambda: None)
+
+    image = "m.daocloud.io/docker.io/library/nginx"
+    normalized = accelerate_docker_pull.canonical_reference(normalize_image_name(image))
+    assert accelerate_docker_pull.accelerate_pull_multi(normalized, [image])
+    assert commands == [["pull", "--quiet", "m.daocloud.io/docker.io/library/nginx:latest"]]
 
 
 if __name__ == "__main__":
-    success = test_conversion()
-    sys.exit(0 if success else 1)
+    sys.exit(pytest.main(["-q", __file__]))